@@ -1,6 +1,7 @@
 import logging
 import copy
 import random
+import time
 
 logger = logging.getLogger(__name__)
 DO_NOTHING_PROBABILITY = 0.1
@@ -8,7 +9,10 @@ DO_NOTHING_PROBABILITY = 0.1
 class Behavior:
     """The Behavior class does the following:
     Provides a method for updating the locations of all the individuals at a given node
-    Provides a method for updating the behavior of a given individual"""
+    Provides a method for updating the behavior of a given individual
+    If a Metrics object is attached to Behavior.metrics, counters and phase timers are recorded in it"""
+    
+    metrics = None
     
     def __init__(self):
         """Behavior constructor"""
@@ -22,9 +26,15 @@ class Behavior:
     def runOneStep(cls, pop, roads):
         """Update the state of each person, location by location, by one time step"""
         logger.debug("Updating one step of the simulation")
+        m = cls.metrics
         
         # Update who is traveling together with whom (i.e., which agents have rendezvoused)
+        if m is not None:
+            t0 = time.perf_counter()
         cls.updateTogetherWith(pop)
+        if m is not None:
+            t1 = time.perf_counter()
+            m.addPhaseTime("updateTogetherWith", t1 - t0)
         
         updatedPeople = {}
         for loc in pop.locations.keys():
@@ -55,7 +65,15 @@ class Behavior:
                         newstate["behavior"] = updatedPeople[pid]["behavior"]
                         pop.locations[loc].remove(member)
                         updatedPeople[member] = newstate
-                    
+                        if m is not None and newstate["location"] != loc:
+                            m.count("moves")
+                
+                if m is not None and updatedPeople[pid]["location"] != loc:
+                    m.count("moves")
+        
+        if m is not None:
+            t2 = time.perf_counter()
+            m.addPhaseTime("behaviors", t2 - t1)
         
         # Update locations dictionary
         updatedLocations = {}
@@ -69,6 +87,8 @@ class Behavior:
                 
         pop.people = updatedPeople
         pop.locations = updatedLocations
+        if m is not None:
+            m.addPhaseTime("updateLocations", time.perf_counter() - t2)
                 
     @classmethod
     def updateTogetherWith(cls, pop):
@@ -93,11 +113,15 @@ class Behavior:
         """Evacuation behavior implementation"""
         
         if (random.random() < DO_NOTHING_PROBABILITY):
+            if cls.metrics is not None:
+                cls.metrics.count("doNothing")
             return st
         
         currentLoc = st["location"]
         if (currentLoc in r.exitNodeList):
             return st
+        if cls.metrics is not None:
+            cls.metrics.count("exitPathLookups")
         nextLoc = r.shortestPaths[currentLoc][1]
         nextSt = copy.deepcopy(st)
         nextSt["location"] = nextLoc
@@ -108,6 +132,8 @@ class Behavior:
         """Rendezvous behavior implementation"""
 
         if (random.random() < DO_NOTHING_PROBABILITY):
+            if cls.metrics is not None:
+                cls.metrics.count("doNothing")
             return st
 
         nextSt = copy.deepcopy(st)
@@ -130,6 +156,8 @@ class Behavior:
         #If groupLocs is empty, all group members are at the same location
         #Change behavior to E
         if not groupLocs:
+            if cls.metrics is not None:
+                cls.metrics.count("rendezvousMerges")
             nextSt["behavior"] = "E"
             return nextSt
         
@@ -144,6 +172,8 @@ class Behavior:
                 closestLoc = loc
         
         shortestPath = r.getShortestPath(st["location"], closestLoc)
+        if cls.metrics is not None:
+            cls.metrics.count("pathQueries", len(groupLocs)+1)
         nextSt["location"] = shortestPath[1]
         return nextSt
     
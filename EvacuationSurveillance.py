@@ -1,19 +1,160 @@
+import time
+_START_TIME = time.perf_counter()
+
+import argparse
+import copy
+import json
 import logging
+import random
+import sys
 
-logging.basicConfig(filename='testRun.log',format='%(name)s - %(levelname)s - %(message)s', level=logging.DEBUG)
 logger = logging.getLogger('EvacuationSurveillance')
 
-from SimulationRunner import SimulationRunner
+# Default scenario; any of these keys can be overridden by a JSON scenario file (see scenarios/example.json)
+DEFAULT_SCENARIO = {
+    "run_number": 2,
+    "file_path": "data/",
+    "seed": None,
+    "population_size": 2000,
+    "steps": 20,
+    "network": { "type": "spatial", "n": 100, "k": 4, "p": 0.1, "exits": 2 }, # "p" is only used by "smallworld"
+    "show_vis": False,
+    "group_to_track": None, # Group ID to highlight in the visualization
+    # Output files, relative to file_path; {run} is replaced by run_number. Make any of them None to skip it.
+    "outputs": {
+        "spatial_locations": "spatial_locations_{run}.txt",
+        "graph_locations": "graph_locations_{run}.txt",
+        "behaviors": "behaviors_{run}.txt",
+        "metrics": "metrics_{run}.json", # Use a .csv extension for CSV output
+        "statistics": "stats_{run}_", # Prefix of the aggregate statistics tables (exited.csv, nodes.csv, occupancy.csv, groups.csv, time_to_exit.csv)
+    },
+    "profile_steps": [], # Time steps to run under cProfile (only used if the metrics output is enabled)
+    "profile_every": None, # Also run every n-th time step under cProfile (only used if the metrics output is enabled)
+    "startup_budget_s": 2.0, # Warn if importing the simulation modules takes longer than this; make it None to skip the check
+}
+
+# Types of the settings whose default is None, which can't be taken from the default value
+SETTING_TYPES = { "seed": int, "group_to_track": int, "profile_every": int }
+# Settings other than those in SETTING_TYPES that may be set to None
+NULLABLE_SETTINGS = { "startup_budget_s", "outputs.spatial_locations", "outputs.graph_locations", "outputs.behaviors", \
+                      "outputs.metrics", "outputs.statistics" }
+
+def loadScenario(filename):
+    """Returns the default scenario updated with the settings in the given JSON file"""
+    scenario = copy.deepcopy(DEFAULT_SCENARIO)
+    if filename is not None:
+        with open(filename) as f:
+            overrides = json.load(f)
+        mergeSettings(scenario, overrides, filename, "")
+    return scenario
+
+def mergeSettings(settings, overrides, filename, prefix):
+    """Update settings with overrides, recursing into nested dicts and rejecting unknown keys"""
+    for key, value in overrides.items():
+        if key not in settings:
+            raise ValueError("Unknown scenario setting " + prefix + key + " in " + filename)
+        if isinstance(settings[key], dict):
+            if not isinstance(value, dict):
+                raise ValueError("Scenario setting " + prefix + key + " in " + filename + " must be an object")
+            mergeSettings(settings[key], value, filename, prefix + key + ".")
+        else:
+            checkSettingType(prefix + key, settings[key], value, filename)
+            settings[key] = value
+
+def checkSettingType(name, default, value, filename):
+    """Raise a ValueError if value doesn't have the type of the named setting"""
+    if value is None:
+        if name in SETTING_TYPES or name in NULLABLE_SETTINGS:
+            return
+        raise ValueError("Scenario setting " + name + " in " + filename + " can't be null")
+    expected = SETTING_TYPES.get(name, type(default))
+    if expected is float:
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+    elif expected is int:
+        ok = isinstance(value, int) and not isinstance(value, bool)
+    else:
+        ok = isinstance(value, expected)
+    if not ok:
+        raise ValueError("Scenario setting " + name + " in " + filename + " must be of type " + expected.__name__)
+
+def networkParams(network):
+    """Returns the network type and the positional parameters for its RoadNetwork generator"""
+    if network["type"] == "spatial":
+        return "spatial", (network["n"], network["k"], network["exits"])
+    if network["type"] == "smallworld":
+        return "smallworld", (network["n"], network["k"], network["p"], network["exits"])
+    raise ValueError("Unknown network type " + str(network["type"]))
+
+def outputFile(scenario, name):
+    filename = scenario["outputs"].get(name)
+    if not filename:
+        return None
+    return scenario["file_path"] + filename.format(run=scenario["run_number"])
+
+def parseArgs(argv):
+    parser = argparse.ArgumentParser(description="Simulate evacuation over a road network.")
+    parser.add_argument("scenario", nargs="?", help="JSON scenario file; settings not given there take their default values")
+    parser.add_argument("--steps", type=int, help="number of time steps to simulate")
+    parser.add_argument("--seed", type=int, help="random seed")
+    parser.add_argument("--run-number", type=int, help="run number used in output file names")
+    visGroup = parser.add_mutually_exclusive_group()
+    visGroup.add_argument("--show-vis", action="store_true", help="show the visualization")
+    visGroup.add_argument("--headless", action="store_true", help="don't show the visualization")
+    parser.add_argument("--no-agent-output", action="store_true",
+                        help="don't write the per-agent spatial location, graph location and behavior files")
+    parser.add_argument("--log-file", help="write the log to this file instead of stderr")
+    parser.add_argument("--log-level", default="WARNING", choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+                        help="logging level (default: WARNING)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parseArgs(argv)
+    logging.basicConfig(filename=args.log_file, format='%(name)s - %(levelname)s - %(message)s',
+                        level=getattr(logging, args.log_level))
+
+    scenario = loadScenario(args.scenario)
+    if args.steps is not None:
+        scenario["steps"] = args.steps
+    if args.seed is not None:
+        scenario["seed"] = args.seed
+    if args.run_number is not None:
+        scenario["run_number"] = args.run_number
+    if args.show_vis:
+        scenario["show_vis"] = True
+    if args.headless:
+        scenario["show_vis"] = False
+    if args.no_agent_output:
+        for name in ["spatial_locations", "graph_locations", "behaviors"]:
+            scenario["outputs"][name] = None
+
+    if scenario["seed"] is not None:
+        random.seed(scenario["seed"])
+
+    from SimulationRunner import SimulationRunner
+    from Metrics import Metrics
+
+    importTime = time.perf_counter() - _START_TIME
+    logger.info("Startup (imports) took %.3f s", importTime)
+    if scenario["startup_budget_s"] is not None and importTime > scenario["startup_budget_s"]:
+        logger.warning("Startup (imports) took %.3f s, over the budget of %.3f s", importTime, scenario["startup_budget_s"])
+
+    logger.info('Starting simulation.')
+    setupStart = time.perf_counter()
+    networkType, params = networkParams(scenario["network"])
+    sr = SimulationRunner(scenario["steps"], scenario["run_number"], scenario["file_path"],
+                          scenario["population_size"], networkType, params)
+
+    metricsFile = outputFile(scenario, "metrics")
+    metrics = None
+    if metricsFile:
+        metrics = Metrics(profileSteps=scenario["profile_steps"], profileEvery=scenario["profile_every"],
+                          profilePrefix=scenario["file_path"] + 'profile_' + str(scenario["run_number"]) + '_step')
 
-RUN_NUMBER = 2
-FILE_PATH = 'data/'
-SHOW_VIS = True
-GROUP_TO_TRACK = 17 # Make it None if SHOW_VIS = False
-SPATIAL_LOCATION_FILE = FILE_PATH + 'spatial_locations_' + str(RUN_NUMBER) + '.txt' # Make it None if you don't want agent spatial locations to be written to file
-GRAPH_LOCATION_FILE = FILE_PATH + 'graph_locations_' + str(RUN_NUMBER) + '.txt' # Make it None if you don't want agent graph locations to be written to file
-BEHAVIOR_FILE = FILE_PATH + 'behaviors_' + str(RUN_NUMBER) + '.txt' # Make it None if you don't want agent behaviors to be written to file
+    logger.info("Setting up the population and road network took %.3f s", time.perf_counter() - setupStart)
 
-logger.info('Starting simulation.')
+    sr.runSimulation(scenario["show_vis"], scenario["group_to_track"],
+                     outputFile(scenario, "spatial_locations"), outputFile(scenario, "graph_locations"),
+                     outputFile(scenario, "behaviors"), metrics, metricsFile, outputFile(scenario, "statistics"))
 
-sr = SimulationRunner(20, RUN_NUMBER, FILE_PATH)
-sr.runSimulation(SHOW_VIS, GROUP_TO_TRACK, SPATIAL_LOCATION_FILE, GRAPH_LOCATION_FILE, BEHAVIOR_FILE)
\ No newline at end of file
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,138 @@
+import logging
+import time
+import json
+import cProfile
+import pstats
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+COUNTER_NAMES = ["moves", "doNothing", "rendezvousMerges", "exitPathLookups", "pathQueries"]
+PHASE_NAMES = ["updateTogetherWith", "behaviors", "updateLocations"]
+
+class Metrics:
+    """The Metrics class does the following:
+    Maintains counters for events in the step loop (moves, do-nothing draws, rendezvous merges,
+        lookups of precomputed exit paths, shortest path queries)
+    Maintains timers for each phase of Behavior.runOneStep
+    Aggregates counters and timers per time step into a ring buffer of the most recent steps
+    Optionally runs cProfile over selected time steps
+    Provides methods for exporting the per-step records as JSON or CSV
+    Instrumentation is only active when a Metrics object is attached to Behavior.metrics,
+    so a run without one pays nothing beyond a None check per event."""
+
+    def __init__(self, capacity=1000, profileSteps=None, profileEvery=None, profilePrefix=None):
+        """Metrics constructor.
+        capacity: number of most recent per-step records to keep
+        profileSteps: collection of time steps to run under cProfile
+        profileEvery: additionally profile every n-th time step (sampling)
+        profilePrefix: if given, profile stats for step t are dumped to profilePrefix + str(t) + '.prof'"""
+        self.records = deque(maxlen=capacity)
+        self.totals = dict.fromkeys(COUNTER_NAMES, 0)
+        self.phaseTotals = dict.fromkeys(PHASE_NAMES, 0.0)
+        self.numSteps = 0
+
+        self.profileSteps = set(profileSteps) if profileSteps else set()
+        self.profileEvery = profileEvery
+        self.profilePrefix = profilePrefix
+        self.profiles = {} # timeStep: pstats.Stats, kept only when profilePrefix is None
+
+        self.counters = dict.fromkeys(COUNTER_NAMES, 0)
+        self.phases = dict.fromkeys(PHASE_NAMES, 0.0)
+        self.__timeStep = None
+        self.__stepStart = None
+        self.__stepTime = None
+        self.__profiler = None
+
+    def die(self):
+        """Metrics destructor."""
+        pass
+
+    def count(self, name, n=1):
+        """Increment the counter with the given name for the current time step"""
+        self.counters[name] += n
+
+    def addPhaseTime(self, name, seconds):
+        """Add elapsed wall-clock seconds to the timer of the given runOneStep phase"""
+        self.phases[name] += seconds
+
+    def __shouldProfile(self, timeStep):
+        if timeStep in self.profileSteps:
+            return True
+        return bool(self.profileEvery) and timeStep % self.profileEvery == 0
+
+    def beginStep(self, timeStep):
+        """Reset the per-step counters and timers, and start the profiler if this step is selected"""
+        self.__timeStep = timeStep
+        self.counters = dict.fromkeys(COUNTER_NAMES, 0)
+        self.phases = dict.fromkeys(PHASE_NAMES, 0.0)
+        if self.__shouldProfile(timeStep):
+            self.__profiler = cProfile.Profile()
+            self.__profiler.enable()
+        self.__stepTime = None
+        self.__stepStart = time.perf_counter()
+
+    def stopStep(self):
+        """Stop the step timer and the profiler, so that work done after the step loop
+        (e.g. output and statistics) is not counted before endStep is called"""
+        if self.__stepTime is None:
+            self.__stepTime = time.perf_counter() - self.__stepStart
+        if self.__profiler is not None:
+            self.__profiler.disable()
+            self.__saveProfile(self.__timeStep, self.__profiler)
+            self.__profiler = None
+
+    def endStep(self, **extra):
+        """Close the current time step and append its record to the ring buffer.
+        Any keyword arguments (e.g. numExited) are stored alongside the counters."""
+        self.stopStep()
+        elapsed = self.__stepTime
+
+        record = {"time_step": self.__timeStep}
+        record.update(self.counters)
+        for name in PHASE_NAMES:
+            record[name + "_s"] = self.phases[name]
+        record["step_s"] = elapsed
+        record.update(extra)
+        self.records.append(record)
+
+        for name in COUNTER_NAMES:
+            self.totals[name] += self.counters[name]
+        for name in PHASE_NAMES:
+            self.phaseTotals[name] += self.phases[name]
+        self.numSteps += 1
+
+    def __saveProfile(self, timeStep, profiler):
+        if self.profilePrefix is not None:
+            filename = self.profilePrefix + str(timeStep) + ".prof"
+            profiler.dump_stats(filename)
+            logger.info("Saved profile for time step " + str(timeStep) + " to file " + filename)
+        else:
+            self.profiles[timeStep] = pstats.Stats(profiler)
+
+    def summary(self):
+        """Returns the run totals of all counters and phase timers"""
+        s = {"num_steps": self.numSteps}
+        s.update(self.totals)
+        for name in PHASE_NAMES:
+            s[name + "_s"] = self.phaseTotals[name]
+        return s
+
+    def saveToJSON(self, filename):
+        """Saves the run summary and the buffered per-step records to the given file as JSON"""
+        with open(filename, "w") as f:
+            json.dump({"summary": self.summary(), "steps": list(self.records)}, f, indent=1)
+        logger.info("Saved metrics to file " + filename)
+
+    def saveToCSV(self, filename):
+        """Saves the buffered per-step records to the given file as CSV, one row per time step"""
+        columns = []
+        for record in self.records:
+            for key in record.keys():
+                if key not in columns:
+                    columns.append(key)
+        with open(filename, "w") as f:
+            f.write(",".join(columns) + "\n")
+            for record in self.records:
+                f.write(",".join(str(record.get(c, "")) for c in columns) + "\n")
+        logger.info("Saved metrics to file " + filename)
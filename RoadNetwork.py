@@ -1,8 +1,6 @@
 import networkx as nx
 import logging
 import random
-from sklearn.neighbors import NearestNeighbors
-import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +25,9 @@ class RoadNetwork:
         """Generate a spatially-embedded road network by choosing n
         random points in a 100x100 square and connecting each point
         to its k nearest neighbors. e exit nodes are chosen randomly."""
+        # scikit-learn and numpy are only needed here, so don't make every run pay for importing them
+        from sklearn.neighbors import NearestNeighbors
+        import numpy as np
         logger.info("Generating a spatial network with " + str(n) + " nodes, " + str(k) +\
                     " neighbors for each node, and " + str(e) + " exit nodes.")
         
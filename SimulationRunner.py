@@ -3,15 +3,13 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-import networkx as nx
-import matplotlib.pyplot as plt
-import RoadNetwork
 from Population import Population
 from RoadNetwork import RoadNetwork
 from Behavior import Behavior
 from PopulationEstimate import PopulationEstimate
 from Estimator import Estimator
 from Observers import Observers
+from Statistics import Statistics
 
 class SimulationRunner:
     """The SimulationRunner does the following:
@@ -21,18 +19,24 @@ class SimulationRunner:
      Creates the Estimator
      Runs the simulation and the Estimator"""
     
-    def __init__(self, maxTimeSteps, runNumber, filePath):
-        """SimulationRunner constructor."""
+    def __init__(self, maxTimeSteps, runNumber, filePath, populationSize=2000, networkType="spatial", networkParams=(100, 4, 2)):
+        """SimulationRunner constructor.
+        networkType is "spatial" or "smallworld"; networkParams are passed on to
+        RoadNetwork.generateSpatialNetwork (n, k, e) or RoadNetwork.generateSmallWorldNetwork (n, k, p, e)."""
         # self.logger = logging.getLogger(__name__ + '.SimulationRunner')
         # self.logger.info("Initializing the simulation.")
         logger.info("Initializing the simulation")
-        self.pop = Population(2000)
-        print("Max group ID:", self.pop.maxGID)
+        self.pop = Population(populationSize)
+        logger.info("Max group ID: " + str(self.pop.maxGID))
         self.roads = RoadNetwork()
-        self.roads.generateSpatialNetwork(100, 4, 2)
-        # self.roads.generateSmallWorldNetwork(100, 5, 0.1, 2)
-        self.roads.saveNetworkToFile(filePath + "roadNetworkSpatial_" + str(runNumber) + ".gml")
-        # self.roads.saveNetworkToFile("roadNetworkSmallWorld.gml")
+        if (networkType == "spatial"):
+            self.roads.generateSpatialNetwork(*networkParams)
+            self.roads.saveNetworkToFile(filePath + "roadNetworkSpatial_" + str(runNumber) + ".gml")
+        elif (networkType == "smallworld"):
+            self.roads.generateSmallWorldNetwork(*networkParams)
+            self.roads.saveNetworkToFile(filePath + "roadNetworkSmallWorld_" + str(runNumber) + ".gml")
+        else:
+            raise ValueError("Unknown network type " + str(networkType))
         # self.behavior = Behavior()
         self.obs = Observers()
         
@@ -61,11 +65,17 @@ class SimulationRunner:
             self.pop.locations[locs[r]].add(pid)
             
             
-    def __numExited(self):
+    def __numExited(self, stats=None):
+        """Number of agents that have reached an exit node while evacuating; agents who are
+        rendezvousing may just be passing through. Uses the Statistics count when it is available."""
+        if (stats is not None):
+            return stats.numExited()
         e = 0
         for loc in self.roads.exitNodeList:
             if (loc in self.pop.locations):
-                e += len(self.pop.locations[loc])
+                for pid in self.pop.locations[loc]:
+                    if (self.pop.people[pid]["behavior"] == "E"):
+                        e += 1
         return e
     
     def writeSpatialLocations(self, fileHandle, timeStep):
@@ -107,11 +117,19 @@ class SimulationRunner:
         fileHandle.write("\n")
         pass
     
-    def runSimulation(self, showVisualization, groupToTrack, spatialLocationOutputFile, graphLocationOutputFile, behaviorOutputFile):
-        """Update the simulation by one time step"""
+    def runSimulation(self, showVisualization, groupToTrack, spatialLocationOutputFile, graphLocationOutputFile, behaviorOutputFile, \
+                      metrics=None, metricsOutputFile=None, statisticsOutputPrefix=None):
+        """Update the simulation by one time step.
+        If metrics (a Metrics object) is given, per-step counters and phase timers are recorded and,
+        if metricsOutputFile is given, saved to it as CSV (.csv extension) or JSON (anything else).
+        If statisticsOutputPrefix is given, aggregate statistics are updated every time step and
+        saved as CSV tables to files starting with that prefix."""
         logger.info("Now starting the simulation.")
         
         if showVisualization:
+            # Plotting libraries are only imported when a visualization is actually requested
+            import networkx as nx
+            import matplotlib.pyplot as plt
             positions = nx.get_node_attributes(self.roads.R ,'pos')
             if not positions:
                 positions = nx.spring_layout(self.roads.R)
@@ -130,44 +148,71 @@ class SimulationRunner:
             behFile = open(behaviorOutputFile, "w")
             self.writeBehaviors(behFile, 0)
         
-        print("Num exited:", self.__numExited())
-        for i in range(self.maxTimeSteps):
-            Behavior.runOneStep(self.pop, self.roads)
+        stats = None
+        if statisticsOutputPrefix:
+            stats = Statistics(self.pop, self.roads)
+            stats.update(self.pop, 0)
+        
+        logger.info("Num exited: " + str(self.__numExited(stats)))
+        # Behavior.metrics is shared class state, so make sure it is detached even if a step fails
+        Behavior.metrics = metrics
+        try:
+            for i in range(self.maxTimeSteps):
+                if metrics is not None:
+                    metrics.beginStep(i+1)
+                Behavior.runOneStep(self.pop, self.roads)
+                if metrics is not None:
+                    metrics.stopStep()
+                if (stats is not None):
+                    stats.update(self.pop, i+1)
+                if metrics is not None:
+                    metrics.endStep(numExited=self.__numExited(stats))
             
-            if (spatialLocationOutputFile):
-                self.writeSpatialLocations(spatialLocFile, i+1)
+                if (spatialLocationOutputFile):
+                    self.writeSpatialLocations(spatialLocFile, i+1)
             
-            if (graphLocationOutputFile):
-                self.writeGraphLocations(graphLocFile, i+1)
+                if (graphLocationOutputFile):
+                    self.writeGraphLocations(graphLocFile, i+1)
                 
-            if (behaviorOutputFile):
-                self.writeBehaviors(behFile, i+1)
+                if (behaviorOutputFile):
+                    self.writeBehaviors(behFile, i+1)
             
-            print("Num exited:", self.__numExited())
-            if showVisualization:
-                color_map = ['blue' for n in self.roads.R.nodes()]
-                labels_dict = {}
-                if (groupToTrack is not None):
-                    pidsToTrack = self.pop.groups[groupToTrack]
-                    for pid in pidsToTrack:
-                        # print("PID:", pid, "Properties:", self.pop.people[pid])
-                        pidLoc = self.pop.people[pid]["location"]
-                        color_map[pidLoc] = 'red'
-                        if (pidLoc in labels_dict):
-                            labels_dict[pidLoc] += ","+str(pid)
-                        else:
-                            labels_dict[pidLoc] = str(pid)
-                for n in self.roads.exitNodeList:
-                    color_map[n] = 'yellow'
+                logger.info("Num exited: " + str(self.__numExited(stats)))
+                if showVisualization:
+                    color_map = ['blue' for n in self.roads.R.nodes()]
+                    labels_dict = {}
+                    if (groupToTrack in self.pop.groups):
+                        pidsToTrack = self.pop.groups[groupToTrack]
+                        for pid in pidsToTrack:
+                            # print("PID:", pid, "Properties:", self.pop.people[pid])
+                            pidLoc = self.pop.people[pid]["location"]
+                            color_map[pidLoc] = 'red'
+                            if (pidLoc in labels_dict):
+                                labels_dict[pidLoc] += ","+str(pid)
+                            else:
+                                labels_dict[pidLoc] = str(pid)
+                    for n in self.roads.exitNodeList:
+                        color_map[n] = 'yellow'
 
-                plt.clf()
-                nx.draw(self.roads.R, pos = positions, node_color = color_map, labels = labels_dict)
-                textvar=plt.figtext(0.99, 0.01, "t="+str(i), horizontalalignment='right')
-                plt.pause(1)
-                # input("Press Enter to continue...")
+                    plt.clf()
+                    nx.draw(self.roads.R, pos = positions, node_color = color_map, labels = labels_dict)
+                    textvar=plt.figtext(0.99, 0.01, "t="+str(i), horizontalalignment='right')
+                    plt.pause(1)
+                    # input("Press Enter to continue...")
+        finally:
+            Behavior.metrics = None
         
         if (showVisualization):
             plt.show()
+        
+        if (stats is not None):
+            stats.saveToFiles(statisticsOutputPrefix)
+        
+        if (metrics is not None and metricsOutputFile):
+            if metricsOutputFile.endswith(".csv"):
+                metrics.saveToCSV(metricsOutputFile)
+            else:
+                metrics.saveToJSON(metricsOutputFile)
         logger.info("Simulation done.")
 
             
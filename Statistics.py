@@ -0,0 +1,120 @@
+import logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# (label, lowest age, highest age) for each age band; children under 11 are the ones who stay put
+AGE_BANDS = [("0-10", 0, 10), ("11-17", 11, 17), ("18-39", 18, 39), ("40-64", 40, 64), ("65+", 65, None)]
+
+def ageBand(age):
+    """Returns the label of the age band the given age falls in"""
+    for label, low, high in AGE_BANDS:
+        if age >= low and (high is None or age <= high):
+            return label
+    return AGE_BANDS[0][0]
+
+class Statistics:
+    """The Statistics class does the following:
+    Updates compact aggregate summaries of the population state after every time step:
+        Cumulative number of exited agents by group size and age band
+        Number of agents at each non-empty node
+        Histogram of node occupancies (how many nodes hold a given number of agents)
+        Number of groups whose members are not all at the same location yet
+        Time to exit of every agent that has exited, aggregated by group size
+    Provides a method for saving the summaries as small tidy CSV tables
+    Agents already counted as exited are skipped with a set difference per exit node,
+    and only groups that have not merged yet are checked."""
+
+    def __init__(self, pop, roads):
+        """Statistics constructor."""
+        self.exitNodes = set(roads.exitNodeList)
+        self.numNodes = roads.getNumberOfNodes()
+
+        self.groupSize = {} # PID: size of the group this person belongs to (1 for individuals)
+        self.ageBandOf = {} # PID: age band label
+        for pid, state in pop.people.items():
+            gid = state["groupID"]
+            self.groupSize[pid] = len(pop.groups[gid]) if gid != -1 else 1
+            self.ageBandOf[pid] = ageBand(state["age"])
+        self.groupSizes = sorted(set(self.groupSize.values()))
+
+        self.exitTime = {} # PID: time step at which the person reached an exit node while evacuating
+        self.exitedAt = dict((loc, set()) for loc in self.exitNodes) # exit node: PIDs counted as exited there
+        self.exitedCounts = Counter() # (group size, age band): number of exited people
+        self.unmergedGroups = set(pop.groups.keys())
+
+        self.exitedRows = [] # (time_step, group_size, age_band, exited)
+        self.nodeRows = [] # (time_step, node, occupancy)
+        self.occupancyRows = [] # (time_step, occupancy, num_nodes)
+        self.groupRows = [] # (time_step, unmerged_groups, exited)
+
+    def die(self):
+        """Statistics destructor."""
+        pass
+
+    def __updateExited(self, pop, timeStep):
+        for loc in self.exitNodes:
+            pids = pop.locations.get(loc)
+            if not pids:
+                continue
+            for pid in pids - self.exitedAt[loc]:
+                # Rendezvousing agents may just be passing through an exit node
+                if pid not in self.exitTime and pop.people[pid]["behavior"] == "E":
+                    self.exitTime[pid] = timeStep
+                    self.exitedAt[loc].add(pid)
+                    self.exitedCounts[(self.groupSize[pid], self.ageBandOf[pid])] += 1
+        for size in self.groupSizes:
+            for label, low, high in AGE_BANDS:
+                self.exitedRows.append((timeStep, size, label, self.exitedCounts[(size, label)]))
+
+    def __updateOccupancy(self, pop, timeStep):
+        for loc in sorted(pop.locations.keys()):
+            if pop.locations[loc]:
+                self.nodeRows.append((timeStep, loc, len(pop.locations[loc])))
+        histogram = Counter(len(pids) for pids in pop.locations.values() if pids)
+        numEmpty = self.numNodes - sum(histogram.values())
+        if numEmpty > 0:
+            histogram[0] = numEmpty
+        for occupancy in sorted(histogram.keys()):
+            self.occupancyRows.append((timeStep, occupancy, histogram[occupancy]))
+
+    def __updateUnmergedGroups(self, pop, timeStep):
+        # Group members at the same location move together from then on, so a merged group stays merged
+        merged = []
+        for gid in self.unmergedGroups:
+            locs = set(pop.people[pid]["location"] for pid in pop.groups[gid])
+            if len(locs) == 1:
+                merged.append(gid)
+        self.unmergedGroups.difference_update(merged)
+        self.groupRows.append((timeStep, len(self.unmergedGroups), len(self.exitTime)))
+
+    def update(self, pop, timeStep):
+        """Update all summaries from the population state at the given time step"""
+        self.__updateExited(pop, timeStep)
+        self.__updateOccupancy(pop, timeStep)
+        self.__updateUnmergedGroups(pop, timeStep)
+
+    def numExited(self):
+        """Returns the number of agents that have reached an exit node while evacuating"""
+        return len(self.exitTime)
+
+    def timeToExitRows(self):
+        """Returns the time to exit distribution as (group_size, time_to_exit, num_agents) rows"""
+        counts = Counter((self.groupSize[pid], t) for pid, t in self.exitTime.items())
+        return [(size, t, counts[(size, t)]) for size, t in sorted(counts.keys())]
+
+    def __writeTable(self, filename, header, rows):
+        f = open(filename, "w")
+        f.write(",".join(header) + "\n")
+        for row in rows:
+            f.write(",".join(str(x) for x in row) + "\n")
+        f.close()
+        logger.info("Saved statistics to file " + filename)
+
+    def saveToFiles(self, filePrefix):
+        """Saves the summaries as CSV tables to files starting with the given prefix"""
+        self.__writeTable(filePrefix + "exited.csv", ["time_step", "group_size", "age_band", "exited"], self.exitedRows)
+        self.__writeTable(filePrefix + "nodes.csv", ["time_step", "node", "occupancy"], self.nodeRows)
+        self.__writeTable(filePrefix + "occupancy.csv", ["time_step", "occupancy", "num_nodes"], self.occupancyRows)
+        self.__writeTable(filePrefix + "groups.csv", ["time_step", "unmerged_groups", "exited"], self.groupRows)
+        self.__writeTable(filePrefix + "time_to_exit.csv", ["group_size", "time_to_exit", "num_agents"], self.timeToExitRows())
@@ -0,0 +1,83 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from EvacuationSurveillance import DEFAULT_SCENARIO, loadScenario, networkParams, outputFile, parseArgs
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def writeScenario(tmp_path, settings):
+    filename = str(tmp_path / "scenario.json")
+    with open(filename, "w") as f:
+        json.dump(settings, f)
+    return filename
+
+
+def test_defaultScenario():
+    scenario = loadScenario(None)
+    assert scenario == DEFAULT_SCENARIO
+    scenario["network"]["n"] = 5
+    assert DEFAULT_SCENARIO["network"]["n"] == 100
+
+
+def test_nestedMerge(tmp_path):
+    scenario = loadScenario(writeScenario(tmp_path, {"steps": 5, "network": {"n": 200}, "outputs": {"behaviors": None}}))
+    assert scenario["steps"] == 5
+    assert scenario["network"] == {"type": "spatial", "n": 200, "k": 4, "p": 0.1, "exits": 2}
+    assert scenario["outputs"]["behaviors"] is None
+    assert scenario["outputs"]["metrics"] == DEFAULT_SCENARIO["outputs"]["metrics"]
+
+
+@pytest.mark.parametrize("settings", [
+    {"stpes": 5},
+    {"outputs": {"statistic": "s_"}},
+    {"network": "spatial"},
+    {"outputs": None},
+    {"seed": {"a": 1}},
+    {"group_to_track": "17"},
+    {"profile_every": 2.5},
+    {"steps": None},
+    {"show_vis": 1},
+    {"population_size": True},
+])
+def test_invalidSettings(tmp_path, settings):
+    with pytest.raises(ValueError):
+        loadScenario(writeScenario(tmp_path, settings))
+
+
+def test_validTypes(tmp_path):
+    scenario = loadScenario(writeScenario(tmp_path, {"seed": 3, "profile_every": None, "startup_budget_s": 1}))
+    assert scenario["seed"] == 3
+    assert scenario["startup_budget_s"] == 1
+
+
+def test_networkParams():
+    assert networkParams({"type": "spatial", "n": 10, "k": 3, "p": 0.1, "exits": 1}) == ("spatial", (10, 3, 1))
+    assert networkParams({"type": "smallworld", "n": 10, "k": 3, "p": 0.2, "exits": 1}) == ("smallworld", (10, 3, 0.2, 1))
+    with pytest.raises(ValueError):
+        networkParams({"type": "grid", "n": 10, "k": 3, "p": 0.1, "exits": 1})
+
+
+def test_outputFile():
+    scenario = loadScenario(None)
+    scenario["run_number"] = 7
+    scenario["outputs"]["behaviors"] = None
+    assert outputFile(scenario, "behaviors") is None
+    assert outputFile(scenario, "metrics") == "data/metrics_7.json"
+
+
+def test_visFlagsExclusive():
+    assert parseArgs(["--show-vis"]).show_vis
+    with pytest.raises(SystemExit):
+        parseArgs(["--show-vis", "--headless"])
+
+
+def test_lazyImports():
+    pytest.importorskip("networkx")
+    code = ("import sys; import SimulationRunner; "
+            "assert 'matplotlib' not in sys.modules; assert 'sklearn' not in sys.modules")
+    subprocess.check_call([sys.executable, "-c", code], cwd=ROOT)
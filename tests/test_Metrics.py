@@ -0,0 +1,100 @@
+import json
+import random
+import time
+
+from Behavior import Behavior
+from Metrics import Metrics, COUNTER_NAMES
+from Population import Population
+
+
+def runSteps(metrics, numSteps):
+    for t in range(1, numSteps+1):
+        metrics.beginStep(t)
+        metrics.count("moves", t)
+        metrics.count("doNothing")
+        metrics.addPhaseTime("behaviors", 0.5)
+        metrics.endStep(numExited=10*t)
+
+
+def test_recordsAndTotals():
+    metrics = Metrics(capacity=2)
+    runSteps(metrics, 3)
+    # Only the last two steps are kept in the ring buffer, the totals cover all of them
+    assert [r["time_step"] for r in metrics.records] == [2, 3]
+    assert metrics.records[-1]["moves"] == 3
+    assert metrics.records[-1]["numExited"] == 30
+    summary = metrics.summary()
+    assert summary["num_steps"] == 3
+    assert summary["moves"] == 6
+    assert summary["doNothing"] == 3
+    assert summary["behaviors_s"] == 1.5
+
+
+def test_profileSteps():
+    metrics = Metrics(profileSteps=[1], profileEvery=3)
+    runSteps(metrics, 6)
+    assert sorted(metrics.profiles.keys()) == [1, 3, 6]
+
+
+def test_save(tmp_path):
+    metrics = Metrics()
+    runSteps(metrics, 2)
+    csvFile = str(tmp_path / "metrics.csv")
+    metrics.saveToCSV(csvFile)
+    with open(csvFile) as f:
+        lines = f.read().splitlines()
+    assert lines[0].split(",")[:len(COUNTER_NAMES)+1] == ["time_step"] + COUNTER_NAMES
+    assert len(lines) == 3
+
+    jsonFile = str(tmp_path / "metrics.json")
+    metrics.saveToJSON(jsonFile)
+    with open(jsonFile) as f:
+        saved = json.load(f)
+    assert saved["summary"]["moves"] == 3
+    assert len(saved["steps"]) == 2
+
+
+def test_stopStep():
+    metrics = Metrics(profileSteps=[1])
+    metrics.beginStep(1)
+    metrics.stopStep()
+    time.sleep(0.05)
+    metrics.endStep()
+    assert metrics.records[-1]["step_s"] < 0.05
+    assert 1 in metrics.profiles
+
+
+class StubRoads:
+    """A path 0-1-...-9 with node 0 as the only exit"""
+    exitNodeList = [0]
+    shortestPaths = dict((n, list(range(n, -1, -1))) for n in range(10))
+
+    def getShortestPath(self, a, b):
+        return list(range(a, b-1, -1)) if a > b else list(range(a, b+1))
+
+    def getNumberOfNodes(self):
+        return 10
+
+
+def test_movesCounted():
+    random.seed(7)
+    pop = Population(100)
+    for loc in range(10):
+        pop.locations[loc] = set()
+    for pid in pop.people:
+        loc = random.randrange(10)
+        pop.people[pid]["location"] = loc
+        pop.locations[loc].add(pid)
+
+    metrics = Metrics()
+    Behavior.metrics = metrics
+    try:
+        for t in range(1, 6):
+            before = dict((pid, state["location"]) for pid, state in pop.people.items())
+            metrics.beginStep(t)
+            Behavior.runOneStep(pop, StubRoads())
+            metrics.endStep()
+            moved = sum(1 for pid, state in pop.people.items() if state["location"] != before[pid])
+            assert metrics.records[-1]["moves"] == moved
+    finally:
+        Behavior.metrics = None
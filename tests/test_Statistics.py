@@ -0,0 +1,114 @@
+from types import SimpleNamespace
+
+from Statistics import Statistics, ageBand
+
+
+class StubRoads:
+    """Four nodes, node 0 is the only exit"""
+    exitNodeList = [0]
+
+    def getNumberOfNodes(self):
+        return 4
+
+
+def person(age, location, groupID, behavior):
+    return {"age": age, "gender": 0, "location": location, "togetherWith": None,
+            "groupID": groupID, "behavior": behavior}
+
+
+def makePopulation():
+    people = {
+        0: person(30, 0, -1, "E"),
+        1: person(40, 1, 0, "R"),
+        2: person(42, 2, 0, "R"),
+        3: person(70, 1, -1, "E"),
+    }
+    pop = SimpleNamespace(people=people, groups={0: {1, 2}}, locations={})
+    setLocations(pop)
+    return pop
+
+
+def setLocations(pop):
+    pop.locations = {}
+    for pid, state in pop.people.items():
+        pop.locations.setdefault(state["location"], set()).add(pid)
+
+
+def move(pop, pid, location, behavior):
+    pop.people[pid]["location"] = location
+    pop.people[pid]["behavior"] = behavior
+
+
+def runScenario():
+    pop = makePopulation()
+    stats = Statistics(pop, StubRoads())
+    stats.update(pop, 0)
+
+    # Individual 3 exits, the pair meets at node 1
+    move(pop, 3, 0, "E")
+    move(pop, 2, 1, "R")
+    setLocations(pop)
+    stats.update(pop, 1)
+
+    # The pair passes through the exit while still rendezvousing
+    move(pop, 1, 0, "R")
+    move(pop, 2, 0, "R")
+    setLocations(pop)
+    stats.update(pop, 2)
+
+    # ... and only counts as exited once it evacuates
+    move(pop, 1, 0, "E")
+    move(pop, 2, 0, "E")
+    setLocations(pop)
+    stats.update(pop, 3)
+    return stats
+
+
+def test_ageBand():
+    assert ageBand(0) == "0-10"
+    assert ageBand(10) == "0-10"
+    assert ageBand(17) == "11-17"
+    assert ageBand(64) == "40-64"
+    assert ageBand(91) == "65+"
+
+
+def test_exitTimes():
+    stats = runScenario()
+    assert stats.exitTime == {0: 0, 3: 1, 1: 3, 2: 3}
+    assert stats.numExited() == 4
+    assert stats.timeToExitRows() == [(1, 0, 1), (1, 1, 1), (2, 3, 2)]
+
+
+def test_exitedRows():
+    stats = runScenario()
+    final = dict(((size, band), exited) for t, size, band, exited in stats.exitedRows if t == 3)
+    assert final[(1, "18-39")] == 1
+    assert final[(1, "65+")] == 1
+    assert final[(2, "40-64")] == 2
+    assert sum(final.values()) == 4
+    atTwo = dict(((size, band), exited) for t, size, band, exited in stats.exitedRows if t == 2)
+    assert atTwo[(2, "40-64")] == 0
+
+
+def test_occupancy():
+    stats = runScenario()
+    assert [row for row in stats.nodeRows if row[0] == 0] == [(0, 0, 1), (0, 1, 2), (0, 2, 1)]
+    assert [row for row in stats.occupancyRows if row[0] == 0] == [(0, 0, 1), (0, 1, 2), (0, 2, 1)]
+    assert [row for row in stats.occupancyRows if row[0] == 3] == [(3, 0, 3), (3, 4, 1)]
+
+
+def test_unmergedGroups():
+    stats = runScenario()
+    assert [unmerged for t, unmerged, exited in stats.groupRows] == [1, 0, 0, 0]
+    assert [exited for t, unmerged, exited in stats.groupRows] == [1, 2, 2, 4]
+
+
+def test_saveToFiles(tmp_path):
+    stats = runScenario()
+    prefix = str(tmp_path / "stats_")
+    stats.saveToFiles(prefix)
+    with open(prefix + "groups.csv") as f:
+        lines = f.read().splitlines()
+    assert lines == ["time_step,unmerged_groups,exited", "0,1,1", "1,0,2", "2,0,2", "3,0,4"]
+    for name in ["exited.csv", "nodes.csv", "occupancy.csv", "time_to_exit.csv"]:
+        assert (tmp_path / ("stats_" + name)).exists()